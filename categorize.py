@@ -47,6 +47,18 @@
         -s --specific dirname [list of comma seperated extensions]
             Target only a certain group of directories.
 
+        --no-index
+            Do not record moved files in the index used by tidy_find.py. By default every moved file is recorded in
+            a trigram index at the destination so it can be found later with tidy_find.py.
+
+        -e --estimate
+            Do not move anything. Instead classify a random sample of the source directory and report the projected
+            number of files and bytes per directory. The projected run time adds the cost of moves measured on a
+            scratch file in a temporary directory under the destination.
+
+        --sample-size n
+            Maximum number of entries sampled by --estimate. Defaults to 200.
+
     Author:
         Written by Anthony Lam
 """
@@ -57,6 +69,9 @@ import logging
 import argparse
 import configparser
 
+from estimate import estimate, format_estimate, positive_int, DEFAULT_SAMPLE_SIZE
+from tidy_find import IndexWriter
+
 
 DEFAULT_CONFIG = {
     "EXTENSION": {
@@ -73,6 +88,7 @@ DEFAULT_CONFIG = {
     }
 
 }
+EXTENSION_REGEX = re.compile("^.*(\\..*)$")
 
 
 # Setup argparser
@@ -124,6 +140,25 @@ parser.add_argument(
             parentDir: [list of subdirectories]
     """
 )
+parser.add_argument(
+    "-e", "--estimate",
+    action="store_true",
+    help="Project file counts, bytes and run time from a sample without moving any source file."
+)
+parser.add_argument(
+    "--sample-size",
+    dest="sample_size",
+    type=positive_int,
+    default=DEFAULT_SAMPLE_SIZE,
+    help="Maximum number of entries sampled by --estimate.",
+    metavar="n"
+)
+parser.add_argument(
+    "--no-index",
+    dest="index",
+    action="store_false",
+    help="Do not record moved files in the index used by tidy_find.py."
+)
 parser.add_argument(
     "src",
     help="Path to source directory.",
@@ -156,24 +191,42 @@ def reverse_dict_kv(target_dict, **kwargs):
     return lut
 
 
+def get_file_category(target, basename, ext_map):
+    """
+    Determines which directory a single entry of target is grouped under. Used by both the real run and the estimate.
+    :param target: path to target dir
+    :param basename: name of an entry in target
+    :param ext_map: dict {"extensions": "dirname"}
+    :return: dirname or None if the entry is not a file or its extension is not mapped
+    """
+    if not os.path.isfile(os.path.join(target, basename)):
+        return None
+    match = EXTENSION_REGEX.match(basename)
+    if not match:
+        logger.debug("No extension found for {}. Ignoring.".format(basename))
+        return None
+    ext = match.group(1)
+    logger.debug("Matched extension {}".format(ext))
+    dir_name_key = ext_map.get(ext)
+    if not dir_name_key:
+        logger.debug("Extension {} is not mapped. Ignoring {}.".format(ext, basename))
+    return dir_name_key
+
+
 def create_file_table(target, ext_map, **kwargs):
     '''
-    Collects all the files in a given directory and group them together by extension based on ext_map
+    Collects all the files in a given directory and group them together by extension based on ext_map.
+    Files without an extension or with an extension missing from ext_map are ignored.
     :param target: path to target dir
-    :param ext_map: dict {dirname: set {extensions,}
+    :param ext_map: dict {"extensions": "dirname"}
     :param kwargs:
     :return: dict {"dirname": set {filenames}
     '''
     table = {}
-    pattern = "^.*(\\..*)$"
-    regex = re.compile(pattern)
     try:
         for basename in os.listdir(target):
-            if os.path.isfile(os.path.join(target, basename)):
-                match = regex.match(basename)
-                ext = match.group(1)
-                logger.debug("Matched extension {}".format(ext))
-                dir_name_key = ext_map[ext]
+            dir_name_key = get_file_category(target, basename, ext_map)
+            if dir_name_key:
                 if not table.get(dir_name_key):
                     table[dir_name_key] = set()
                 table[dir_name_key].add(basename)
@@ -183,6 +236,23 @@ def create_file_table(target, ext_map, **kwargs):
     return table
 
 
+def get_category_path(dir_name, subdir_dir_lut):
+    """
+    Builds the path of a category below the destination by walking up the DIRECTORY mapping
+    :param dir_name: category dirname e.g. "audio"
+    :param subdir_dir_lut: dict {"subdirectory": "parentDir"}
+    :return: relative path e.g. "media/audio"
+    """
+    path = []
+    path.append(dir_name)
+    parent_dir = subdir_dir_lut.get(dir_name, None)
+    while parent_dir:
+        path.append(parent_dir)
+        parent_dir = subdir_dir_lut.get(parent_dir, None)
+    path.reverse()
+    return os.path.join(*path)
+
+
 def categorize(src, destination, config_dict=DEFAULT_CONFIG, **kwargs):
     dir_ext_lut = config_dict["EXTENSION"]
     dir_subdir_lut = config_dict["DIRECTORY"]
@@ -190,24 +260,45 @@ def categorize(src, destination, config_dict=DEFAULT_CONFIG, **kwargs):
     subdir_dir_lut = reverse_dict_kv(dir_subdir_lut)
     file_table = create_file_table(src, ext_dir_lut)
 
-    for dir, files in file_table.items():
-        path = []
-        path.append(dir)
-        parent_dir = subdir_dir_lut.get(dir, None)
-        while parent_dir:
-            path.append(parent_dir)
-            parent_dir = subdir_dir_lut.get(parent_dir, None)
-        path.reverse()
-        path = os.path.join(destination, *path)
-        if not os.path.exists(path):
-            os.makedirs(path)
-        for file in files:
-            file_loc = os.path.join(src, file)
-            dest_loc = os.path.join(path, file)
-            if os.path.exists(dest_loc):
-                logger.warning("File at {} naming conflict with file at {}. Skipping.".format(file_loc, dest_loc))
-                continue
-            os.rename(file_loc, dest_loc)
+    index = IndexWriter(destination) if kwargs.get("index", True) else None
+    try:
+        for dir, files in file_table.items():
+            path = os.path.join(destination, get_category_path(dir, subdir_dir_lut))
+            if not os.path.exists(path):
+                os.makedirs(path)
+            for file in files:
+                file_loc = os.path.join(src, file)
+                dest_loc = os.path.join(path, file)
+                if os.path.exists(dest_loc):
+                    logger.warning("File at {} naming conflict with file at {}. Skipping.".format(file_loc, dest_loc))
+                    continue
+                os.rename(file_loc, dest_loc)
+                if index:
+                    index.add(dest_loc)
+    finally:
+        if index:
+            index.close()
+
+
+def estimate_categorize(src, config_dict=DEFAULT_CONFIG, **kwargs):
+    """
+    Projects where categorize would place the files in src by classifying a random sample of it. Categories are
+    reported as paths below the destination, e.g. "media/images".
+    :param src: path to source dir
+    :param config_dict: dict {"EXTENSION": {dirname: set {extensions}}, "DIRECTORY": {parentDir: set {dirnames}}}
+    :param kwargs: destination and index (default True) select where moves are timed and whether index bookkeeping is
+                   included, sample_size, time_budget and seed are passed on to estimate
+    :return: dict report, see estimate.estimate
+    """
+    ext_dir_lut = reverse_dict_kv(config_dict["EXTENSION"])
+    subdir_dir_lut = reverse_dict_kv(config_dict["DIRECTORY"])
+
+    def classify(basename):
+        dir_name = get_file_category(src, basename, ext_dir_lut)
+        return get_category_path(dir_name, subdir_dir_lut) if dir_name else None
+
+    index_factory = IndexWriter if kwargs.pop("index", True) else None
+    return estimate(src, classify, index_factory=index_factory, **kwargs)
 
 
 def parse_configparser_object(config):
@@ -239,6 +330,15 @@ if __name__ == "__main__":
             config = configparser.ConfigParser()
             config.read(config_path)
             config_dict = parse_configparser_object(config)
-            categorize(src, dest, config_dict=config_dict)
+            if cl_inp.estimate:
+                print(format_estimate(estimate_categorize(
+                    src, config_dict=config_dict, destination=dest, index=cl_inp.index, sample_size=cl_inp.sample_size
+                )))
+            else:
+                categorize(src, dest, config_dict=config_dict, index=cl_inp.index)
+    elif cl_inp.estimate:
+        print(format_estimate(estimate_categorize(
+            src, destination=dest, index=cl_inp.index, sample_size=cl_inp.sample_size
+        )))
     else:
-        categorize(src, dest)
\ No newline at end of file
+        categorize(src, dest, index=cl_inp.index)
@@ -0,0 +1,257 @@
+"""
+    Name:
+        estimate - sampling based projection of a categorize/organize run
+
+    Description:
+        "estimate" answers "how long will this take and where will things land" without moving anything. It lists
+        the source directory once, draws a simple random sample of its entries and pushes only the sample through the
+        same classification the real run uses (an extension map for categorize, a regex for organize). Per-category
+        file counts, bytes and the run time are then projected onto the whole directory with 95% confidence
+        intervals.
+
+        Sampling stops at sample_size entries or once time_budget seconds have been spent, whichever comes first, so
+        the I/O cost stays well under a second even on very large shares. The run time covers listing and
+        classifying every entry plus moving every file that would be moved. The cost of a move is measured by moving
+        a scratch file around a temporary directory created under the destination, including the existence check,
+        directory creation and index bookkeeping the real run does. No source file is touched.
+
+    Author:
+        Written by Anthony Lam
+"""
+
+import os
+import math
+import time
+import random
+import shutil
+import logging
+import argparse
+import tempfile
+
+
+DEFAULT_SAMPLE_SIZE = 200
+DEFAULT_TIME_BUDGET = 0.25
+DEFAULT_MOVE_PROBES = 32
+# z-score of a two sided 95% confidence interval
+Z_95 = 1.96
+SKIPPED = "(skipped)"
+# category a classify callable can return for entries the real run would quarantine instead of move
+QUARANTINED = "(quarantined)"
+
+logger = logging.getLogger(__name__)
+
+
+def positive_int(value):
+    """
+    argparse type for options such as --sample-size that need at least one
+    :param value: str from the command line
+    :return: int
+    """
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("{} is not an integer!".format(value))
+    if number < 1:
+        raise argparse.ArgumentTypeError("{} should be at least 1!".format(value))
+    return number
+
+
+def non_negative_float(value):
+    """
+    argparse type for options such as --match-timeout where 0 is meaningful but negative values are not
+    :param value: str from the command line
+    :return: float
+    """
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError("{} is not a number!".format(value))
+    if not number >= 0 or math.isinf(number):
+        raise argparse.ArgumentTypeError("{} should be a finite number of at least 0!".format(value))
+    return number
+
+
+def estimate_total(values, population):
+    """
+    Projects the population total of values observed on a simple random sample drawn without replacement
+    :param values: list of numbers observed on the sample
+    :param population: int number of entries the sample was drawn from
+    :return: tuple (estimated total, half width of the 95% confidence interval, math.inf if it cannot be bounded)
+    """
+    n = len(values)
+    if n == 0:
+        return 0.0, 0.0
+    mean = sum(values) / n
+    total = mean * population
+    # A full census is exact
+    if n >= population:
+        return total, 0.0
+    # A single observation carries no variance information
+    if n < 2:
+        return total, math.inf
+    variance = sum((v - mean) ** 2 for v in values) / (n - 1)
+    half_width = Z_95 * population * math.sqrt(variance / n * (1 - n / population))
+    return total, half_width
+
+
+def measure_move_cost(destination, probes=DEFAULT_MOVE_PROBES, index_factory=None):
+    """
+    Times what a run does per moved file by moving a scratch file through a temporary directory under destination
+    :param destination: directory files would be moved to, its nearest existing parent is used if it does not exist
+    :param probes: int number of moves to time, at least 3
+    :param index_factory: optional callable taking a root and returning a writer with add, flush and close, e.g.
+                          tidy_find.IndexWriter, so index bookkeeping is part of the cost
+    :return: tuple (list of seconds per move, seconds per created directory, fixed seconds per run)
+    """
+    root = os.path.abspath(destination)
+    while not os.path.isdir(root):
+        root = os.path.dirname(root)
+    scratch = tempfile.mkdtemp(prefix=".tidy_estimate_", dir=root)
+    try:
+        target_dir = os.path.join(scratch, "category", "leaf")
+        start = time.perf_counter()
+        os.makedirs(target_dir)
+        mkdir_seconds = (time.perf_counter() - start) / 2
+        source = os.path.join(scratch, "scratch")
+        open(source, "w").close()
+        index = index_factory(scratch) if index_factory else None
+        seconds = []
+        flushes = []
+        for i in range(probes):
+            target = os.path.join(target_dir, "scratch{}".format(i))
+            start = time.perf_counter()
+            if not os.path.exists(target):
+                os.rename(source, target)
+                if index:
+                    index.add(target)
+            seconds.append(time.perf_counter() - start)
+            source = target
+            # Flushing 1 and then probes - 1 files separates the fixed cost of a flush from its cost per file
+            if index and i in (0, probes - 1):
+                start = time.perf_counter()
+                index.flush()
+                flushes.append(time.perf_counter() - start)
+        fixed_seconds = 0.0
+        if index:
+            index.close()
+            per_file = max((flushes[1] - flushes[0]) / (probes - 2), 0.0)
+            fixed_seconds = max(flushes[0] - per_file, 0.0)
+            seconds = [elapsed + per_file for elapsed in seconds]
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return seconds, mkdir_seconds, fixed_seconds
+
+
+def sample_directory(path, classify, sample_size=DEFAULT_SAMPLE_SIZE, time_budget=DEFAULT_TIME_BUDGET, seed=None):
+    """
+    Classifies a random sample of the entries in path
+    :param path: path to directory to sample
+    :param classify: callable taking a basename and returning a category or None if the entry would be skipped
+    :param sample_size: int maximum number of entries to classify
+    :param time_budget: float seconds after which sampling stops early
+    :param seed: optional seed for the random sample
+    :return: tuple (number of entries in path, seconds spent listing, list of (category, size, seconds) per sample)
+    """
+    if not isinstance(sample_size, int) or sample_size < 1:
+        raise ValueError("sample_size should be a positive integer!")
+    start = time.perf_counter()
+    try:
+        names = os.listdir(path)
+    except FileNotFoundError:
+        logger.error("{} is an invalid path.".format(path))
+        raise FileNotFoundError("Please provide a valid path to a directory!")
+    list_seconds = time.perf_counter() - start
+
+    rng = random.Random(seed)
+    order = rng.sample(names, min(sample_size, len(names)))
+    deadline = time.perf_counter() + time_budget
+    samples = []
+    for name in order:
+        start = time.perf_counter()
+        category = classify(name)
+        size = 0
+        if category is not None:
+            try:
+                size = os.stat(os.path.join(path, name)).st_size
+            except OSError as err:
+                logger.warning("Could not stat {}: {}".format(name, err))
+                category = None
+        samples.append((category, size, time.perf_counter() - start))
+        if time.perf_counter() > deadline:
+            logger.info("Time budget reached after {} samples.".format(len(samples)))
+            break
+    return len(names), list_seconds, samples
+
+
+def estimate(path, classify, **kwargs):
+    """
+    Projects per-category file counts, bytes and run time for path from a random sample
+    :param path: path to directory to estimate
+    :param classify: callable taking a basename and returning a category or None if the entry would be skipped
+    :param kwargs: destination (defaults to path), index_factory and move_probes are passed on to measure_move_cost,
+                   sample_size, time_budget and seed are passed on to sample_directory
+    :return: dict {"population": int, "sampled": int, "seconds": (est, ci),
+                   "categories": {category: {"files": (est, ci), "bytes": (est, ci)}}}
+    """
+    destination = kwargs.pop("destination", None) or path
+    index_factory = kwargs.pop("index_factory", None)
+    move_probes = kwargs.pop("move_probes", DEFAULT_MOVE_PROBES)
+    population, list_seconds, samples = sample_directory(path, classify, **kwargs)
+    move_seconds, mkdir_seconds, fixed_seconds = measure_move_cost(destination, move_probes, index_factory)
+    categories = {}
+    for category in {category for category, _, _ in samples}:
+        key = SKIPPED if category is None else category
+        categories[key] = {
+            "files": estimate_total([1 if c == category else 0 for c, _, _ in samples], population),
+            "bytes": estimate_total([size if c == category else 0 for c, size, _ in samples], population)
+        }
+    # Every entry is classified, only files that are not skipped or quarantined are moved
+    moved = [0 if category in (None, QUARANTINED) else 1 for category, _, _ in samples]
+    move_mean = sum(move_seconds) / len(move_seconds)
+    seconds, seconds_ci = estimate_total(
+        [elapsed + move_mean * is_moved for (_, _, elapsed), is_moved in zip(samples, moved)], population
+    )
+    moved_total, _ = estimate_total(moved, population)
+    if len(move_seconds) > 1:
+        move_variance = sum((s - move_mean) ** 2 for s in move_seconds) / (len(move_seconds) - 1)
+        move_ci = Z_95 * math.sqrt(move_variance / len(move_seconds))
+        seconds_ci = math.sqrt(seconds_ci ** 2 + (moved_total * move_ci) ** 2)
+    directories = len({category for category, _, _ in samples if category not in (None, QUARANTINED)})
+    seconds += list_seconds + fixed_seconds + directories * mkdir_seconds
+    return {
+        "population": population,
+        "sampled": len(samples),
+        "seconds": (seconds, seconds_ci),
+        "categories": categories
+    }
+
+
+def _format_interval(estimate_value, half_width):
+    if math.isinf(half_width):
+        return "{:.0f} +/- unknown".format(estimate_value)
+    return "{:.0f} +/- {:.0f}".format(estimate_value, half_width)
+
+
+def format_estimate(report):
+    """
+    Renders a report returned by estimate as a human readable table
+    :param report: dict returned by estimate
+    :return: str
+    """
+    lines = ["Estimated from {} of {} entries (95% confidence):".format(report["sampled"], report["population"])]
+    rows = sorted(report["categories"].items(), key=lambda kv: (kv[0] in (QUARANTINED, SKIPPED), kv[0]))
+    width = max([len("category")] + [len(name) for name, _ in rows])
+    lines.append("  {:<{w}}  {:>20}  {:>28}".format("category", "files", "bytes", w=width))
+    for name, stats in rows:
+        lines.append("  {:<{w}}  {:>20}  {:>28}".format(
+            name,
+            _format_interval(*stats["files"]),
+            _format_interval(*stats["bytes"]),
+            w=width
+        ))
+    seconds, seconds_ci = report["seconds"]
+    if math.isinf(seconds_ci):
+        lines.append("Projected run time: {:.3f}s +/- unknown".format(seconds))
+    else:
+        lines.append("Projected run time: {:.3f}s +/- {:.3f}s".format(seconds, seconds_ci))
+    return "\n".join(lines)
@@ -24,11 +24,39 @@
         -v, --verbose
             output detailed logs to standard out
 
+        -j, --jobs
+            number of worker processes used to match file names against the pattern, at least 1. Defaults to the
+            number of cores
+
+        --match-timeout
+            seconds a single file name may spend matching the pattern before it is quarantined, i.e. left in place
+            and reported instead of moved. Guards against catastrophic backtracking in custom patterns. 0 disables
+            the guard. Defaults to 1
+
+        --no-index
+            do not record moved files in the trigram index at the destination used by tidy_find.py
+
+        -e, --estimate
+            do not move anything. Instead match a random sample of the source directory and report the projected
+            number of files and bytes per subdirectory. The projected run time adds the cost of moves measured on a
+            scratch file in a temporary directory under the destination
+
+        --sample-size
+            maximum number of entries sampled by --estimate. Defaults to 200
+
     Author:
         Written by Anthony Lam
 """
 
-import os, re, argparse, logging
+import os, re, signal, argparse, logging, threading
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from estimate import estimate, format_estimate, positive_int, non_negative_float, DEFAULT_SAMPLE_SIZE, QUARANTINED
+from tidy_find import IndexWriter, INDEX_DIRNAME
+
+DEFAULT_PATTERN = "^(.*?)_(.*?)_.*?\\..{3,4}$"
+DEFAULT_CHUNK_SIZE = 1024
+DEFAULT_MATCH_TIMEOUT = 1.0
 
 # Configure parse
 parser = argparse.ArgumentParser(
@@ -49,13 +77,44 @@ parser.add_argument(
 parser.add_argument(
     "-p", "--pattern",
     help="Specify custom regex to match files.",
-    default="^(.*?)_(.*?)_.*?\\..{3,4}$"
+    default=DEFAULT_PATTERN
 )
 parser.add_argument(
     "-v", "--verbose",
     help="Set verbose output.",
     action="store_true"
 )
+parser.add_argument(
+    "-j", "--jobs",
+    help="Number of worker processes used for pattern matching, at least 1. Defaults to the number of cores.",
+    dest="workers",
+    type=positive_int
+)
+parser.add_argument(
+    "--match-timeout",
+    help="Seconds a single file name may spend matching before it is quarantined, 0 disables the guard.",
+    dest="match_timeout",
+    type=non_negative_float,
+    default=DEFAULT_MATCH_TIMEOUT
+)
+parser.add_argument(
+    "--no-index",
+    help="Do not record moved files in the index used by tidy_find.py.",
+    dest="index",
+    action="store_false"
+)
+parser.add_argument(
+    "-e", "--estimate",
+    help="Project file counts, bytes and run time from a sample without moving any source file.",
+    action="store_true"
+)
+parser.add_argument(
+    "--sample-size",
+    help="Maximum number of entries sampled by --estimate.",
+    dest="sample_size",
+    type=positive_int,
+    default=DEFAULT_SAMPLE_SIZE
+)
 
 logger = logging.getLogger(__name__)
 ch = logging.StreamHandler()
@@ -63,35 +122,125 @@ ch.setLevel(logging.DEBUG)
 logger.addHandler(ch)
 
 
+class MatchTimeout(Exception):
+    """Raised when a single regex match runs past its time budget."""
+
+
+def _raise_match_timeout(signum, frame):
+    raise MatchTimeout()
+
+
+def match_names(pattern, timeout, names):
+    """
+    Matches each name against pattern. Every match gets at most timeout seconds, names that run over are quarantined.
+    The budget is enforced with SIGALRM so it is only active on the main thread of platforms that provide setitimer.
+    :param pattern: regex string
+    :param timeout: seconds allowed per match, None or 0 disables the guard
+    :param names: list of file names
+    :return: tuple ([(name, groups)], [quarantined names])
+    """
+    regex = re.compile(pattern)
+    guard = bool(timeout) and hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+    matches, quarantined = [], []
+    if guard:
+        previous_handler = signal.signal(signal.SIGALRM, _raise_match_timeout)
+    try:
+        for name in names:
+            # The handler can also run right after regex.match returns, before an assignment would store the result.
+            # list.extend stores it from C first, so a match that completed is kept even if the alarm lands then.
+            found = []
+            try:
+                try:
+                    if guard:
+                        signal.setitimer(signal.ITIMER_REAL, timeout)
+                    found.extend(map(regex.match, (name,)))
+                finally:
+                    if guard:
+                        signal.setitimer(signal.ITIMER_REAL, 0)
+            except MatchTimeout:
+                pass
+            if not found:
+                quarantined.append(name)
+            elif found[0]:
+                matches.append((name, found[0].groups()))
+    finally:
+        if guard:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+    return matches, quarantined
+
+
+def match_file_names(names, pattern, **kwargs):
+    """
+    Splits names into chunks and matches them against pattern on a process pool. A single chunk is matched in process
+    to avoid paying for pool startup on small directories.
+    :param names: list of file names
+    :param pattern: regex string
+    :param kwargs: workers (default cpu count), chunk_size (default 1024), match_timeout (seconds per match, 0 or None
+                   disables the guard)
+    :return: tuple ([(name, groups)], [quarantined names])
+    """
+    # Fail fast on an invalid pattern or settings instead of inside every worker
+    re.compile(pattern)
+    workers = kwargs.get("workers")
+    if workers is not None and (not isinstance(workers, int) or workers < 1):
+        raise ValueError("workers should be a positive integer!")
+    workers = workers or os.cpu_count() or 1
+    chunk_size = kwargs.get("chunk_size") or DEFAULT_CHUNK_SIZE
+    timeout = kwargs.get("match_timeout", DEFAULT_MATCH_TIMEOUT)
+    if timeout is not None and timeout < 0:
+        raise ValueError("match_timeout should be at least 0!")
+    chunks = [names[i:i + chunk_size] for i in range(0, len(names), chunk_size)]
+    if workers == 1 or len(chunks) <= 1:
+        results = [match_names(pattern, timeout, chunk) for chunk in chunks]
+    else:
+        logger.info("Matching {} names in {} chunks on {} workers.".format(len(names), len(chunks), workers))
+        with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            results = list(pool.map(partial(match_names, pattern, timeout), chunks))
+    matches, quarantined = [], []
+    for chunk_matches, chunk_quarantined in results:
+        matches.extend(chunk_matches)
+        quarantined.extend(chunk_quarantined)
+    return matches, quarantined
+
+
 def get_file_paths_table(path, **kwargs):
     """
     :param path: path to root directory
-    :param kwargs: optional
+    :param kwargs: optional pattern, workers, chunk_size and match_timeout (see match_file_names)
     :return: {sub_dir_path: set(file names)}
     """
     logger.info("Building file LUT...")
     paths = dict()
     pattern = kwargs.get("pattern", None)
     if not pattern:
-        pattern = "^(.*?)_(.*?)_.*?\\..{3,4}$"
+        pattern = DEFAULT_PATTERN
     logger.info("Using pattern: {}".format(pattern))
-    regex = re.compile(pattern)
     try:
-        for file in os.listdir(path):
-            logger.debug("Checking: {}".format(file))
-            match = regex.match(file)
-            if match:
-                logger.info("Found match: {}".format(file))
-                logger.debug("Group captured: {}".format(match.groups()))
-                subdir_path = os.path.join("", *match.groups())
-                if not paths.get(subdir_path):
-                    logger.info("Building path at {}.".format(subdir_path))
-                    paths[subdir_path] = set()
-                paths[subdir_path].add(file)
-
+        # The index kept by tidy_find is never organized
+        files = [file for file in os.listdir(path) if file != INDEX_DIRNAME]
     except FileNotFoundError as err:
         logger.error("{} is an invalid path.".format(path))
         raise FileNotFoundError("Please provide a valid path.")
+    matches, quarantined = match_file_names(
+        files,
+        pattern,
+        workers=kwargs.get("workers"),
+        chunk_size=kwargs.get("chunk_size"),
+        match_timeout=kwargs.get("match_timeout", DEFAULT_MATCH_TIMEOUT)
+    )
+    for file, groups in matches:
+        logger.info("Found match: {}".format(file))
+        logger.debug("Group captured: {}".format(groups))
+        subdir_path = os.path.join("", *groups)
+        if not paths.get(subdir_path):
+            logger.info("Building path at {}.".format(subdir_path))
+            paths[subdir_path] = set()
+        paths[subdir_path].add(file)
+    for file in quarantined:
+        logger.warning("Quarantined {}: matching exceeded the time budget. File left in place.".format(file))
+    if quarantined:
+        logger.warning("{} files quarantined. Consider simplifying the pattern.".format(len(quarantined)))
     if not paths:
         logger.warning("No files were found. Please check directory or provide a different regex.")
     return paths
@@ -146,25 +295,67 @@ def organize(source, destination, **kwargs):
     :param kwargs:
     :return:
     """
-    table = get_file_paths_table(source, pattern=kwargs.get("pattern"), verbose=kwargs.get("verbose", False))
+    table = get_file_paths_table(
+        source,
+        pattern=kwargs.get("pattern"),
+        verbose=kwargs.get("verbose", False),
+        workers=kwargs.get("workers"),
+        chunk_size=kwargs.get("chunk_size"),
+        match_timeout=kwargs.get("match_timeout", DEFAULT_MATCH_TIMEOUT)
+    )
     # stop when nothing left to do
     if not table:
         logger.info("Did not find anything to organize.")
         return
     create_subdirectories(destination, table, verbose=kwargs.get("verbose", False))
-    for path, files in table.items():
-        for file in files:
-            src_path = os.path.join(source, file)
-            dest_path = os.path.join(destination, path, file)
-            # avoid writing over files already in the destination & avoid conflicts with dir
-            if os.path.exists(dest_path):
-                logger.warning("Skipping {} because a file is already detected at {}.".format(file, dest_path))
-                continue
-            logger.debug("Moving {} to {}.".format(file, dest_path))
-            os.rename(src_path, dest_path)
-            logger.info("{} moved to {}.".format(file, dest_path))
+    index = IndexWriter(destination) if kwargs.get("index", True) else None
+    try:
+        for path, files in table.items():
+            for file in files:
+                src_path = os.path.join(source, file)
+                dest_path = os.path.join(destination, path, file)
+                # avoid writing over files already in the destination & avoid conflicts with dir
+                if os.path.exists(dest_path):
+                    logger.warning("Skipping {} because a file is already detected at {}.".format(file, dest_path))
+                    continue
+                logger.debug("Moving {} to {}.".format(file, dest_path))
+                os.rename(src_path, dest_path)
+                logger.info("{} moved to {}.".format(file, dest_path))
+                if index:
+                    index.add(dest_path)
+    finally:
+        if index:
+            index.close()
 
 
+def estimate_organize(source, **kwargs):
+    """
+    Projects where organize would place the files in source by matching a random sample of it against pattern
+    :param source: dir to take files from
+    :param kwargs: pattern and match_timeout, destination and index (default True) select where moves are timed and
+                   whether index bookkeeping is included, sample_size, time_budget and seed are passed on to estimate
+    :return: dict report, see estimate.estimate
+    """
+    pattern = kwargs.pop("pattern", None) or DEFAULT_PATTERN
+    timeout = kwargs.pop("match_timeout", DEFAULT_MATCH_TIMEOUT)
+    logger.info("Using pattern: {}".format(pattern))
+    re.compile(pattern)
+
+    def classify(file):
+        if file == INDEX_DIRNAME:
+            return None
+        matches, quarantined = match_names(pattern, timeout, [file])
+        if quarantined:
+            return QUARANTINED
+        return os.path.join("", *matches[0][1]) if matches else None
+
+    index_factory = IndexWriter if kwargs.pop("index", True) else None
+    report = estimate(source, classify, index_factory=index_factory, **kwargs)
+    if QUARANTINED in report["categories"]:
+        logger.warning("Some sampled names exceeded the match time budget and would be quarantined. "
+                       "Consider simplifying the pattern.")
+    return report
+
 
 if __name__ == "__main__":
     cl_inp = parser.parse_args()
@@ -176,4 +367,11 @@ if __name__ == "__main__":
         logger.setLevel(logging.DEBUG)
     else:
         logger.setLevel(logging.WARN)
-    organize(src, dest, pattern=pattern, verbose=verbose)
+    if cl_inp.estimate:
+        print(format_estimate(estimate_organize(
+            src, pattern=pattern, match_timeout=cl_inp.match_timeout, destination=dest, index=cl_inp.index,
+            sample_size=cl_inp.sample_size
+        )))
+    else:
+        organize(src, dest, pattern=pattern, verbose=verbose, workers=cl_inp.workers,
+                 match_timeout=cl_inp.match_timeout, index=cl_inp.index)
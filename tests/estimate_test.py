@@ -0,0 +1,126 @@
+from unittest import TestCase, TestSuite, TextTestRunner, TestResult, makeSuite
+from estimate import estimate_total, estimate, format_estimate, positive_int, non_negative_float, \
+    measure_move_cost
+from categorize import estimate_categorize, categorize
+from organize import estimate_organize
+from tidy_find import IndexWriter
+from tests.utils import generate_files
+from argparse import ArgumentTypeError
+import shutil, os, math, random
+
+
+class TestEstimateTotal(TestCase):
+    def test_empty_sample(self):
+        self.assertEqual(estimate_total([], 100), (0.0, 0.0))
+
+    def test_census_is_exact(self):
+        self.assertEqual(estimate_total([1, 0, 1, 1], 4), (3.0, 0.0))
+
+    def test_partial_sample(self):
+        total, half_width = estimate_total([1, 0, 1, 0], 100)
+        self.assertEqual(total, 50.0)
+        self.assertGreater(half_width, 0)
+
+    def test_single_observation_is_unbounded(self):
+        self.assertEqual(estimate_total([1], 100), (100.0, math.inf))
+        self.assertEqual(estimate_total([1], 1), (1.0, 0.0))
+
+    def test_positive_int(self):
+        self.assertEqual(positive_int("3"), 3)
+        with self.assertRaises(ArgumentTypeError):
+            positive_int("0")
+        with self.assertRaises(ArgumentTypeError):
+            positive_int("-1")
+
+    def test_non_negative_float(self):
+        self.assertEqual(non_negative_float("0"), 0.0)
+        self.assertEqual(non_negative_float("0.5"), 0.5)
+        for value in ("-1", "nan", "inf", "x"):
+            with self.assertRaises(ArgumentTypeError):
+                non_negative_float(value)
+
+
+class TestEstimateDirectory(TestCase):
+    def setUp(self):
+        generate_files("testDirEstimate", "ENEE408A_HOMEWORK1_", numFiles=6)
+        generate_files("testDirEstimate", "pic", extension="png", numFiles=4)
+
+    def test_invalid_path(self):
+        with self.assertRaises(FileNotFoundError):
+            estimate("pathThatDoesNotExists", lambda name: None)
+
+    def test_estimate_categorize_census(self):
+        report = estimate_categorize("testDirEstimate")
+        self.assertEqual(report["population"], 10)
+        self.assertEqual(report["sampled"], 10)
+        self.assertEqual(report["categories"]["documents"]["files"], (6.0, 0.0))
+        self.assertEqual(report["categories"][os.path.join("media", "images")]["files"], (4.0, 0.0))
+
+    def test_estimate_organize_sample(self):
+        report = estimate_organize("testDirEstimate", sample_size=5, seed=0)
+        self.assertEqual(report["sampled"], 5)
+        # Draw the same sample to know how many course files it holds
+        sample = random.Random(0).sample(os.listdir("testDirEstimate"), 5)
+        expected = 10 * sum(1 for name in sample if name.startswith("ENEE408A")) / 5
+        actual = report["categories"].get(os.path.join("ENEE408A", "HOMEWORK1"), {"files": (0.0, 0.0)})["files"][0]
+        self.assertAlmostEqual(actual, expected)
+
+    def test_estimate_single_sample(self):
+        report = estimate_organize("testDirEstimate", sample_size=1, seed=0)
+        self.assertEqual(report["sampled"], 1)
+        (stats,) = report["categories"].values()
+        self.assertEqual(stats["files"], (10.0, math.inf))
+        self.assertIn("unknown", format_estimate(report))
+
+    def test_invalid_sample_size(self):
+        with self.assertRaises(ValueError):
+            estimate_organize("testDirEstimate", sample_size=0)
+
+    def test_estimate_categorize_matches_run(self):
+        generate_files("testDirEstimate", "script", extension="py")
+        open(os.path.join("testDirEstimate", "noext"), "w").close()
+        report = estimate_categorize("testDirEstimate")
+        self.assertEqual(report["categories"]["(skipped)"]["files"], (2.0, 0.0))
+        categorize("testDirEstimate", "testDirEstimate", index=False)
+        self.assertEqual(sorted(os.listdir("testDirEstimate")), ["documents", "media", "noext", "script0.py"])
+
+    def test_estimate_organize_quarantined(self):
+        generate_files("testDirEstimate", "a" * 30, extension="b")
+        report = estimate_organize("testDirEstimate", pattern="^((?:[A-Za-z0-9]+)+)_(.*?)_.*$", match_timeout=0.05,
+                                   sample_size=11, time_budget=5)
+        self.assertEqual(report["categories"]["(quarantined)"]["files"], (1.0, 0.0))
+        self.assertEqual(report["categories"][os.path.join("ENEE408A", "HOMEWORK1")]["files"], (6.0, 0.0))
+
+    def test_estimate_moves_nothing(self):
+        files_before = sorted(os.listdir("testDirEstimate"))
+        estimate_organize("testDirEstimate")
+        self.assertEqual(files_before, sorted(os.listdir("testDirEstimate")))
+
+    def test_measure_move_cost_cleans_up(self):
+        seconds, mkdir_seconds, fixed_seconds = measure_move_cost("testDirEstimate", probes=4,
+                                                                  index_factory=IndexWriter)
+        self.assertEqual(len(seconds), 4)
+        self.assertTrue(all(elapsed > 0 for elapsed in seconds))
+        self.assertGreaterEqual(fixed_seconds, 0)
+        self.assertFalse([name for name in os.listdir("testDirEstimate") if name.startswith(".tidy_estimate_")])
+
+    def test_estimate_times_moves_under_destination(self):
+        os.mkdir("testDirEstimateDest")
+        try:
+            report = estimate_categorize("testDirEstimate", destination="testDirEstimateDest")
+            self.assertGreater(report["seconds"][0], 0)
+            self.assertEqual(os.listdir("testDirEstimateDest"), [])
+        finally:
+            shutil.rmtree("testDirEstimateDest")
+
+    def tearDown(self):
+        shutil.rmtree("testDirEstimate")
+
+
+if __name__ == "__main__":
+    suite = TestSuite()
+    result = TestResult()
+    runner = TextTestRunner()
+    suite.addTest(makeSuite(TestEstimateTotal))
+    suite.addTest(makeSuite(TestEstimateDirectory))
+    print(runner.run(suite))
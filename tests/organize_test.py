@@ -1,5 +1,5 @@
 from unittest import TestCase, TestSuite, TextTestRunner, TestResult, makeSuite
-from organize import get_file_paths_table, create_subdirectories, organize
+from organize import get_file_paths_table, create_subdirectories, organize, match_names, match_file_names, parser
 from tests.utils import generate_files
 import shutil, os
 
@@ -124,6 +124,56 @@ class TestOrganizeManyFiles(TestCase):
             shutil.rmtree("newTestDirMany")
 
 
+class TestOrganizeMatching(TestCase):
+    def setUp(self):
+        generate_files("testDirPool", "ENEE408A_HOMEWORK1_", 10)
+        generate_files("testDirPool", "a" * 30, extension="b")
+
+    def test_match_file_names_pool(self):
+        names = ["ENEE408A_HOMEWORK{}_0.txt".format(i) for i in range(10)] + ["nomatch"]
+        matches, quarantined = match_file_names(names, "^(.*?)_(.*?)_.*?\\..{3,4}$", workers=2, chunk_size=3)
+        self.assertEqual(len(matches), 10)
+        self.assertIn(("ENEE408A_HOMEWORK9_0.txt", ("ENEE408A", "HOMEWORK9")), matches)
+        self.assertEqual(quarantined, [])
+
+    def test_match_names_quarantine(self):
+        matches, quarantined = match_names("^(a+)+$", 0.05, ["aaa", "a" * 40 + "b"])
+        self.assertEqual(matches, [("aaa", ("aaa",))])
+        self.assertEqual(quarantined, ["a" * 40 + "b"])
+
+    def test_match_names_alarm_storm(self):
+        # Alarms landing around fast matches must neither escape nor lose a name
+        names = ["a"] * 20000
+        matches, quarantined = match_names("^(a)$", 1e-5, names)
+        self.assertEqual(len(matches) + len(quarantined), len(names))
+        self.assertTrue(all(groups == ("a",) for _, groups in matches))
+
+    def test_match_settings_validated(self):
+        with self.assertRaises(ValueError):
+            match_file_names(["a"], "^(a)$", workers=0)
+        with self.assertRaises(ValueError):
+            match_file_names(["a"], "^(a)$", match_timeout=-1)
+        self.assertEqual(match_file_names(["a"], "^(a)$", match_timeout=0), ([("a", ("a",))], []))
+
+    def test_cli_types(self):
+        with self.assertRaises(SystemExit):
+            parser.parse_args([".", "-j", "-2"])
+        with self.assertRaises(SystemExit):
+            parser.parse_args([".", "-j", "0"])
+        with self.assertRaises(SystemExit):
+            parser.parse_args([".", "--match-timeout", "-1"])
+        cl_inp = parser.parse_args([".", "-j", "2", "--match-timeout", "0"])
+        self.assertEqual((cl_inp.workers, cl_inp.match_timeout), (2, 0.0))
+
+    def test_organize_skips_quarantined(self):
+        organize("testDirPool", "testDirPool", pattern="^((?:[A-Za-z0-9]+)+)_(.*?)_.*$", match_timeout=0.05)
+        self.assertTrue(os.path.isfile(os.path.join("testDirPool", "a" * 30 + "0.b")))
+        self.assertEqual(len(os.listdir(os.path.join("testDirPool", "ENEE408A", "HOMEWORK1"))), 10)
+
+    def tearDown(self):
+        shutil.rmtree("testDirPool")
+
+
 if __name__ == "__main__":
     if __name__ == '__main__':
         suite = TestSuite()
@@ -132,4 +182,5 @@ if __name__ == "__main__":
         suite.addTest(makeSuite(TestOrganizingNoFiles))
         suite.addTest(makeSuite(TestOrganizeSingleFile))
         suite.addTest(makeSuite(TestOrganizeManyFiles))
+        suite.addTest(makeSuite(TestOrganizeMatching))
         print(runner.run(suite))
\ No newline at end of file
@@ -0,0 +1,46 @@
+"""
+Query latency of tidy_find at growing archive sizes. Not part of the test suite, run it with
+    python -m tests.tidy_find_benchmark [sizes...]
+Latency should stay roughly flat for limited searches and grow far slower than the archive for the rest.
+"""
+from tidy_find import IndexWriter, TrigramIndex, INDEX_DIRNAME
+import os, sys, time, random, shutil, tempfile
+
+WORDS = ["report", "final", "invoice", "homework", "lecture", "notes", "draft", "scan", "photo", "budget",
+         "summary", "meeting", "contract", "receipt", "slides", "thesis", "memo", "backup", "export", "review"]
+EXTENSIONS = ["pdf", "docx", "txt", "jpeg", "png", "xlsx", "pptx"]
+QUERIES = [("search", "invoice", 50), ("search", "report_final", 50), ("search", "homework_2019", None),
+           ("fuzzy", "homwork", 50), ("fuzzy", "reprt_finl", 50)]
+
+
+def build(root, size, seed=0):
+    rng = random.Random(seed)
+    with IndexWriter(root) as index:
+        for i in range(size):
+            name = "{}_{}_{}.{}".format(rng.choice(WORDS), rng.choice(WORDS), rng.randint(1990, 2030),
+                                        rng.choice(EXTENSIONS))
+            index.add(os.path.join(root, rng.choice(WORDS), name))
+
+
+def run(sizes):
+    for size in sizes:
+        root = tempfile.mkdtemp()
+        try:
+            start = time.perf_counter()
+            build(root, size)
+            build_seconds = time.perf_counter() - start
+            index_bytes = sum(os.path.getsize(os.path.join(root, INDEX_DIRNAME, name))
+                              for name in os.listdir(os.path.join(root, INDEX_DIRNAME)))
+            print("{} names: built in {:.2f}s, {:.1f} bytes per name".format(size, build_seconds, index_bytes / size))
+            with TrigramIndex(root) as index:
+                for kind, query, limit in QUERIES:
+                    start = time.perf_counter()
+                    found = len(getattr(index, kind)(query, limit=limit))
+                    print("  {:<6} {:<14} limit={:<5} {:>6} hits  {:.4f}s".format(
+                        kind, query, str(limit), found, time.perf_counter() - start))
+        finally:
+            shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    run([int(size) for size in sys.argv[1:]] or [10000, 100000, 500000])
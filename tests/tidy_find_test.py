@@ -0,0 +1,222 @@
+from unittest import TestCase, TestSuite, TextTestRunner, TestResult, makeSuite, mock
+from tidy_find import IndexWriter, TrigramIndex, Segment, parser, trigrams, INDEX_DIRNAME, MERGE_FACTOR, NAMES_FILE, \
+    OFFSETS_FILE, OFFSET_RECORD, _segment_paths
+from organize import organize
+from categorize import categorize
+from tests.utils import generate_files
+from array import array
+import shutil, os, sys
+
+import logging
+logging.disable(logging.CRITICAL)
+
+
+class TestTrigramIndex(TestCase):
+    def setUp(self):
+        os.mkdir("testDirIndex")
+        with IndexWriter("testDirIndex") as index:
+            index.add(os.path.join("testDirIndex", "ENEE408A", "HOMEWORK1", "ENEE408A_HOMEWORK1_0.pdf"))
+            index.add(os.path.join("testDirIndex", "media", "images", "cat.jpeg"))
+            index.add(os.path.join("testDirIndex", "documents", "Lecture1.ppt"))
+
+    def test_trigrams_ignore_case_and_dirs(self):
+        self.assertEqual(trigrams(os.path.join("Dir", "ABCd")), trigrams("abcd"))
+        self.assertEqual(len(trigrams("abcd")), 2)
+
+    def test_search_substring(self):
+        with TrigramIndex("testDirIndex") as index:
+            self.assertEqual(index.search("homework"), [os.path.join("ENEE408A", "HOMEWORK1", "ENEE408A_HOMEWORK1_0.pdf")])
+            self.assertEqual(index.search("cat"), [os.path.join("media", "images", "cat.jpeg")])
+            self.assertEqual(index.search("dog"), [])
+
+    def test_search_short_query(self):
+        with TrigramIndex("testDirIndex") as index:
+            self.assertEqual(len(index.search("e")), 3)
+
+    def test_fuzzy(self):
+        with TrigramIndex("testDirIndex") as index:
+            self.assertEqual(index.fuzzy("lectur1.ppt")[0], os.path.join("documents", "Lecture1.ppt"))
+
+    def test_fuzzy_ranks_by_shared_trigrams(self):
+        with IndexWriter("testDirIndex") as index:
+            index.add(os.path.join("testDirIndex", "lecture2.ppt"))
+            index.add(os.path.join("testDirIndex", "lectures.pdf"))
+        with TrigramIndex("testDirIndex") as index:
+            self.assertEqual(index.fuzzy("lecture1.ppt"), [os.path.join("documents", "Lecture1.ppt"), "lecture2.ppt",
+                                                           "lectures.pdf"])
+
+    def test_fuzzy_candidates_capped(self):
+        with IndexWriter("testDirIndex") as index:
+            for i in range(5):
+                index.add(os.path.join("testDirIndex", "lecture{}.ppt".format(i)))
+        with TrigramIndex("testDirIndex") as index, mock.patch("tidy_find.MAX_FUZZY_CANDIDATES", 2):
+            self.assertEqual(index.fuzzy("lecture.ppt"), ["lecture4.ppt", "lecture3.ppt"])
+
+    def test_postings_viewed_in_place(self):
+        index_dir = os.path.join("testDirIndex", INDEX_DIRNAME)
+        (path,) = _segment_paths(index_dir)
+        segment = Segment(path)
+        postings = segment.lookup(trigrams("jpe").pop())
+        self.assertIsInstance(postings, memoryview if sys.byteorder == "little" else array)
+        self.assertEqual(list(postings), [1])
+        self.assertIsNone(segment.lookup(trigrams("zzz").pop()))
+        del postings
+        segment.close()
+
+    def test_large_index_search(self):
+        # Every name shares the common trigrams of "report", only a few hold the rare "q42"
+        with IndexWriter("testDirIndex") as index:
+            for i in range(20000):
+                index.add(os.path.join("testDirIndex", "report_{}{}.txt".format("q" if i % 5000 == 0 else "n", i)))
+        with TrigramIndex("testDirIndex") as index:
+            self.assertEqual(index.search("report_n19999", limit=1), ["report_n19999.txt"])
+            self.assertEqual(index.search("report_q1"), ["report_q15000.txt", "report_q10000.txt"])
+            self.assertEqual(len(index.search("report_", limit=50)), 50)
+
+    def test_incremental_and_compaction(self):
+        runs = 4 * MERGE_FACTOR
+        for i in range(runs):
+            with IndexWriter("testDirIndex") as index:
+                index.add(os.path.join("testDirIndex", "notes{}.txt".format(i)))
+        self.assertLess(len(_segment_paths(os.path.join("testDirIndex", INDEX_DIRNAME))), runs)
+        with TrigramIndex("testDirIndex") as index:
+            self.assertEqual(len(index), runs + 3)
+            self.assertEqual(index.search("notes", limit=2), ["notes{}.txt".format(runs - 1),
+                                                             "notes{}.txt".format(runs - 2)])
+            self.assertEqual(len(index.search("notes")), runs)
+            self.assertEqual(index.search("cat"), [os.path.join("media", "images", "cat.jpeg")])
+
+    def test_iter_search_is_lazy(self):
+        with TrigramIndex("testDirIndex") as index:
+            matches = index.iter_search("e")
+            self.assertEqual(next(matches), os.path.join("documents", "Lecture1.ppt"))
+
+    def test_recover_partial_write(self):
+        index_dir = os.path.join("testDirIndex", INDEX_DIRNAME)
+        # Simulate a flush interrupted part way through a record
+        with open(os.path.join(index_dir, NAMES_FILE), "ab") as file:
+            file.write(b"half")
+        with open(os.path.join(index_dir, OFFSETS_FILE), "ab") as file:
+            file.write(b"\0" * 5)
+        with IndexWriter("testDirIndex") as index:
+            index.add(os.path.join("testDirIndex", "late.txt"))
+        with TrigramIndex("testDirIndex") as index:
+            self.assertEqual(len(index), 4)
+            self.assertEqual(index.search("late"), ["late.txt"])
+            self.assertEqual(index.search("cat"), [os.path.join("media", "images", "cat.jpeg")])
+
+    def test_cli_limit(self):
+        for limit in ("0", "-3"):
+            with self.assertRaises(SystemExit):
+                parser.parse_args(["testDirIndex", "cat", "-n", limit])
+        self.assertEqual(parser.parse_args(["testDirIndex", "cat", "-n", "2"]).limit, 2)
+
+    def test_crash_after_merge_replace(self):
+        index_dir = os.path.join("testDirIndex", INDEX_DIRNAME)
+        for i in range(MERGE_FACTOR - 1):
+            index = IndexWriter("testDirIndex")
+            index.add(os.path.join("testDirIndex", "notes{}.txt".format(i)))
+            index.flush()
+        inputs = _segment_paths(index_dir)
+        for path in inputs:
+            shutil.copy(path, path + ".bak")
+        IndexWriter("testDirIndex")._merge(inputs)
+        # Put the inputs back as if the merge crashed before removing them
+        for path in inputs:
+            os.replace(path + ".bak", path)
+        self.assertEqual(len(_segment_paths(index_dir)), len(inputs) + 1)
+        with TrigramIndex("testDirIndex") as index:
+            self.assertEqual(len(index.segments), 1)
+            self.assertEqual(index.search("notes"), ["notes2.txt", "notes1.txt", "notes0.txt"])
+            self.assertEqual(index.search("cat"), [os.path.join("media", "images", "cat.jpeg")])
+        with IndexWriter("testDirIndex") as index:
+            index.add(os.path.join("testDirIndex", "notes3.txt"))
+        self.assertEqual(len(_segment_paths(index_dir)), 2)
+        with TrigramIndex("testDirIndex") as index:
+            self.assertEqual(index.search("notes"), ["notes3.txt", "notes2.txt", "notes1.txt", "notes0.txt"])
+
+    def test_crash_before_offsets_commit(self):
+        index_dir = os.path.join("testDirIndex", INDEX_DIRNAME)
+        offsets_size = os.path.getsize(os.path.join(index_dir, OFFSETS_FILE))
+        with IndexWriter("testDirIndex") as index:
+            index.add(os.path.join("testDirIndex", "lost.txt"))
+        # Drop the offsets as if the flush crashed after writing its segment and names
+        os.truncate(os.path.join(index_dir, OFFSETS_FILE), offsets_size)
+        with TrigramIndex("testDirIndex") as index:
+            self.assertEqual(len(index), 3)
+            self.assertEqual(index.search("lost"), [])
+        with IndexWriter("testDirIndex") as index:
+            index.add(os.path.join("testDirIndex", "late.txt"))
+        self.assertEqual(len(_segment_paths(index_dir)), 2)
+        with TrigramIndex("testDirIndex") as index:
+            self.assertEqual(len(index), 4)
+            self.assertEqual(index.search("late"), ["late.txt"])
+            self.assertEqual(index.search("lost"), [])
+
+    def test_ids_without_segment(self):
+        index_dir = os.path.join("testDirIndex", INDEX_DIRNAME)
+        names_size = os.path.getsize(os.path.join(index_dir, NAMES_FILE))
+        # Names and offsets appended by a flush whose segment never made it to disk
+        with open(os.path.join(index_dir, NAMES_FILE), "ab") as file:
+            file.write(b"orphan.txt")
+        with open(os.path.join(index_dir, OFFSETS_FILE), "ab") as file:
+            file.write(OFFSET_RECORD.pack(names_size, len(b"orphan.txt")))
+        with TrigramIndex("testDirIndex") as index:
+            self.assertEqual(len(index), 3)
+            self.assertEqual(len(index.search("e")), 3)
+        with IndexWriter("testDirIndex") as index:
+            index.add(os.path.join("testDirIndex", "late.txt"))
+        with TrigramIndex("testDirIndex") as index:
+            self.assertEqual(len(index), 4)
+            self.assertEqual(index.search("orphan"), [])
+            self.assertEqual(index.search("late"), ["late.txt"])
+
+    def test_merge_rejects_overlapping_ids(self):
+        index_dir = os.path.join("testDirIndex", INDEX_DIRNAME)
+        (path,) = _segment_paths(index_dir)
+        shutil.copy(path, os.path.join(index_dir, "segment-1.tri"))
+        with self.assertRaises(ValueError):
+            IndexWriter("testDirIndex")._merge(_segment_paths(index_dir))
+
+    def test_missing_index(self):
+        with self.assertRaises(FileNotFoundError):
+            TrigramIndex("pathThatDoesNotExists")
+
+    def tearDown(self):
+        shutil.rmtree("testDirIndex")
+
+
+class TestIndexMovedFiles(TestCase):
+    def setUp(self):
+        generate_files("testDirMoved", "ENEE408A_HOMEWORK1_", 3)
+        generate_files("testDirMoved", "pic", extension="png", numFiles=2)
+
+    def test_organize_indexes_moves(self):
+        organize("testDirMoved", "testDirMoved")
+        with TrigramIndex("testDirMoved") as index:
+            self.assertEqual(len(index.search("homework1")), 3)
+            self.assertEqual(index.search("pic"), [])
+
+    def test_categorize_indexes_moves(self):
+        categorize("testDirMoved", "testDirMovedDest")
+        with TrigramIndex("testDirMovedDest") as index:
+            self.assertEqual(sorted(index.search("pic")), [os.path.join("media", "images", "pic0.png"),
+                                                           os.path.join("media", "images", "pic1.png")])
+
+    def test_no_index(self):
+        organize("testDirMoved", "testDirMoved", index=False)
+        self.assertFalse(os.path.exists(os.path.join("testDirMoved", INDEX_DIRNAME)))
+
+    def tearDown(self):
+        shutil.rmtree("testDirMoved")
+        if os.path.isdir("testDirMovedDest"):
+            shutil.rmtree("testDirMovedDest")
+
+
+if __name__ == "__main__":
+    suite = TestSuite()
+    result = TestResult()
+    runner = TextTestRunner()
+    suite.addTest(makeSuite(TestTrigramIndex))
+    suite.addTest(makeSuite(TestIndexMovedFiles))
+    print(runner.run(suite))
@@ -0,0 +1,695 @@
+#! /usr/bin/env python3
+"""
+    Name:
+        tidy_find - find where categorize or organize placed a file
+
+    Synopsis:
+        tidy_find.py path query [options]
+
+    Description:
+        "tidy_find" answers "where did X go?" without walking the whole archive. Every time categorize or organize
+        moves a file into "path" the new location is recorded in a trigram index kept at path/.tidy_index. Queries
+        look up the trigrams (runs of three characters) of the query instead of scanning names, so they stay fast on
+        archives with tens of millions of files. Matching is case insensitive and done against file names only.
+
+        By default every indexed file whose name contains "query" is printed, newest first. Files that have since
+        been moved or deleted are left out.
+
+        -f, --fuzzy
+            rank files by how many trigrams of "query" their name shares instead of requiring an exact substring.
+            Useful when the exact spelling is not known
+
+        -n, --limit
+            maximum number of results to print, at least 1. Defaults to 50
+
+        -v, --verbose
+            output detailed logs to standard out
+
+        Index layout:
+            names.bin       relative paths of moved files, appended in move order
+            offsets.bin     (offset, length) of each path in names.bin, the position is the id of the file
+            segment-N.tri   sorted posting lists of file ids per trigram as little endian 32 bit integers, followed
+                            by a table of sorted trigram keys and where each key's postings start. The header records
+                            the range of ids the segment holds and the segments a merge replaced with it
+            lock            held exclusively while writing and shared while opening the index
+
+        Each run that moves files appends its paths and writes one new segment. Segments are read through mmap and
+        posting lists are searched in place, so a query only touches the few ids it probes instead of decoding every
+        list its trigrams appear in.
+        Once 4 or more of the newest segments are of a similar size they are merged into one with a streaming merge,
+        so older, larger segments are rewritten only rarely.
+
+        A flush writes its segment before the names and offsets it covers, the offsets commit it. Opening the index
+        for writing first undoes whatever an interrupted flush or merge left behind: segments replaced by a merged
+        one, segments whose offsets were never written and ids that have no segment.
+
+    Author:
+        Written by Anthony Lam
+"""
+
+import os
+import sys
+import math
+import mmap
+import heapq
+import struct
+import argparse
+import logging
+import itertools
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+from estimate import positive_int
+
+try:
+    import fcntl
+except ImportError:
+    # Windows has no flock, the index is then left unlocked
+    fcntl = None
+
+
+INDEX_DIRNAME = ".tidy_index"
+NAMES_FILE = "names.bin"
+OFFSETS_FILE = "offsets.bin"
+LOCK_FILE = "lock"
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".tri"
+SEGMENT_MAGIC = b"TIDYTRI4"
+# magic, number of trigram keys, byte offset of the key table, lowest segment number merged into the segment (its own
+# number if it was flushed), first id and one past the last id it holds
+SEGMENT_HEADER = struct.Struct("<8sIQIII")
+# offset and length of a path in names.bin
+OFFSET_RECORD = struct.Struct("<QI")
+MERGE_FACTOR = 4
+FLUSH_EVERY = 100000
+DEFAULT_LIMIT = 50
+DEFAULT_FUZZY_THRESHOLD = 0.5
+# names sharing a trigram with a fuzzy query that are scored, newest first
+MAX_FUZZY_CANDIDATES = 10000
+
+
+# Setup argparser
+parser = argparse.ArgumentParser(
+    description="find where categorize or organize placed a file",
+    usage="python3 tidy_find.py [-h] [options] path/to/archive query"
+)
+parser.add_argument(
+    "root",
+    help="Path to the destination directory files were categorized or organized into.",
+    metavar="path/to/archive"
+)
+parser.add_argument(
+    "query",
+    help="Part of the file name to look for."
+)
+parser.add_argument(
+    "-f", "--fuzzy",
+    help="Rank by shared trigrams instead of requiring an exact substring.",
+    action="store_true"
+)
+parser.add_argument(
+    "-n", "--limit",
+    help="Maximum number of results, at least 1.",
+    type=positive_int,
+    default=DEFAULT_LIMIT
+)
+parser.add_argument(
+    "-v", "--verbose",
+    help="Set verbose output.",
+    action="store_true"
+)
+
+logger = logging.getLogger(__name__)
+ch = logging.StreamHandler()
+ch.setLevel(logging.DEBUG)
+logger.addHandler(ch)
+
+
+def trigrams(name):
+    """
+    Packs every run of three bytes in the lower cased basename of name into an int key
+    :param name: file name or path
+    :return: set {int}
+    """
+    data = os.fsencode(os.path.basename(name).lower())
+    return {data[i] << 16 | data[i + 1] << 8 | data[i + 2] for i in range(len(data) - 2)}
+
+
+def _view_of(buffer, start, count, typecode):
+    """
+    Returns a sequence of count little endian integers of typecode starting at byte start of buffer, zero copy on
+    little endian machines
+    """
+    raw = buffer[start:start + count * array(typecode).itemsize]
+    if sys.byteorder == "little":
+        return raw.cast(typecode)
+    values = array(typecode)
+    values.frombytes(raw)
+    values.byteswap()
+    return values
+
+
+def _to_le_bytes(values):
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _copy_ids(values):
+    """
+    Copies a view returned by _view_of out of its map, so the map can be closed while the copy is still in use
+    """
+    return values if isinstance(values, array) else array("I", values.tobytes())
+
+
+def _contains(postings, doc_id):
+    i = bisect_left(postings, doc_id)
+    return i < len(postings) and postings[i] == doc_id
+
+
+def _map_file(path):
+    """
+    Memory maps path read only. Empty or missing files map to empty bytes since mmap rejects them.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None, b""
+    file = open(path, "rb")
+    return file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _segment_number(path):
+    return int(os.path.basename(path)[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+
+
+def _segment_paths(index_dir):
+    paths = [os.path.join(index_dir, name) for name in os.listdir(index_dir)
+             if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)]
+    paths.sort(key=_segment_number)
+    return paths
+
+
+def _next_segment_path(index_dir):
+    paths = _segment_paths(index_dir)
+    number = _segment_number(paths[-1]) + 1 if paths else 0
+    return os.path.join(index_dir, "{}{}{}".format(SEGMENT_PREFIX, number, SEGMENT_SUFFIX))
+
+
+def _tier(path):
+    """
+    Size class of a segment, segments in the same tier are within MERGE_FACTOR times of each other in size
+    """
+    return int(math.log(max(os.path.getsize(path), 1), MERGE_FACTOR))
+
+
+@contextmanager
+def _index_lock(index_dir, shared=False):
+    """
+    Holds flock on the lock file of index_dir. Readers skip locking if the lock file does not exist or cannot be
+    opened, e.g. on a read only share.
+    :param index_dir: path to the index directory
+    :param shared: take a shared instead of an exclusive lock
+    """
+    lock_path = os.path.join(index_dir, LOCK_FILE)
+    try:
+        file = open(lock_path, "rb" if shared else "ab")
+    except OSError:
+        if not shared:
+            raise
+        yield
+        return
+    with file:
+        if fcntl:
+            fcntl.flock(file.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+
+def _read_header(path):
+    """
+    :param path: path to a segment file
+    :return: tuple (number of keys, table offset, first merged segment number, first id, end id)
+    """
+    with open(path, "rb") as file:
+        data = file.read(SEGMENT_HEADER.size)
+    if len(data) < SEGMENT_HEADER.size or data[:len(SEGMENT_MAGIC)] != SEGMENT_MAGIC:
+        raise ValueError("{} is not a trigram segment!".format(path))
+    return SEGMENT_HEADER.unpack(data)[1:]
+
+
+def _live_segments(index_dir, count):
+    """
+    Sorts the segments of index_dir into the ones a reader should use and the ones an interrupted run left behind
+    :param index_dir: path to the index directory
+    :param count: number of complete records in offsets.bin
+    :return: tuple ([paths of live segments ordered by id], [paths of stale segments])
+    """
+    headers = {path: _read_header(path) for path in _segment_paths(index_dir)}
+    superseded = set()
+    for path, (_, _, first_number, _, _) in headers.items():
+        superseded.update(range(first_number, _segment_number(path)))
+    live, stale = [], []
+    for path, (_, _, _, _, end_id) in headers.items():
+        # A merge that crashed before removing its inputs leaves them superseded, a flush that crashed before
+        # writing its offsets leaves a segment past the last committed id
+        if _segment_number(path) in superseded or end_id > count:
+            stale.append(path)
+        else:
+            live.append(path)
+    live.sort(key=lambda path: headers[path][3])
+    return live, stale
+
+
+def _trim_tail(names_path, offsets_path, count=None):
+    """
+    Drops a partially written tail so ids and offsets stay aligned, and optionally every id from count on
+    :param names_path: path to names.bin
+    :param offsets_path: path to offsets.bin
+    :param count: optional int number of ids to keep at most
+    :return: tuple (next id, next offset in names.bin)
+    """
+    names_size = os.path.getsize(names_path) if os.path.exists(names_path) else 0
+    offsets_size = os.path.getsize(offsets_path) if os.path.exists(offsets_path) else 0
+    records = offsets_size // OFFSET_RECORD.size
+    if count is None or count > records:
+        count = records
+    end = 0
+    if count:
+        with open(offsets_path, "rb") as file:
+            while count:
+                file.seek((count - 1) * OFFSET_RECORD.size)
+                offset, length = OFFSET_RECORD.unpack(file.read(OFFSET_RECORD.size))
+                end = offset + length
+                if end <= names_size:
+                    break
+                count -= 1
+                end = 0
+    if offsets_size != count * OFFSET_RECORD.size:
+        logger.warning("Dropping {} bytes of incomplete offsets from the index.".format(
+            offsets_size - count * OFFSET_RECORD.size))
+        os.truncate(offsets_path, count * OFFSET_RECORD.size)
+    if names_size != end:
+        logger.warning("Dropping {} bytes of incomplete names from the index.".format(names_size - end))
+        os.truncate(names_path, end)
+    return count, end
+
+
+def _recover(index_dir):
+    """
+    Rolls the index back to its last committed state after an interrupted flush or merge. Must be called with the
+    exclusive lock held.
+    :param index_dir: path to the index directory
+    :return: tuple (next id, next offset in names.bin, [paths of live segments ordered by id])
+    """
+    names_path = os.path.join(index_dir, NAMES_FILE)
+    offsets_path = os.path.join(index_dir, OFFSETS_FILE)
+    for name in os.listdir(index_dir):
+        if name.endswith(".tmp"):
+            logger.warning("Removing unfinished {} from the index.".format(name))
+            os.remove(os.path.join(index_dir, name))
+    count, _ = _trim_tail(names_path, offsets_path)
+    live, stale = _live_segments(index_dir, count)
+    for path in stale:
+        logger.warning("Removing stale segment {} from the index.".format(os.path.basename(path)))
+        os.remove(path)
+    # Ids past the newest live segment were appended by a flush that never wrote its segment
+    committed = _read_header(live[-1])[4] if live else 0
+    count, end = _trim_tail(names_path, offsets_path, committed)
+    return count, end, live
+
+
+def _write_segment(path, items, first_number, first_id, end_id):
+    """
+    Streams (trigram key, sorted ids) pairs in ascending key order to path as a segment. Only the key table is kept
+    in memory.
+    :param path: path of the segment to write
+    :param items: iterable of (int key, array('I') of ids)
+    :param first_number: lowest segment number the segment replaces, its own number unless it is a merge
+    :param first_id: int first id held by the segment
+    :param end_id: int one past the last id held by the segment
+    """
+    keys = array("I")
+    starts = array("Q", [0])
+    count = 0
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as file:
+        file.write(SEGMENT_HEADER.pack(SEGMENT_MAGIC, 0, 0, 0, 0, 0))
+        for key, ids in items:
+            file.write(_to_le_bytes(ids))
+            count += len(ids)
+            keys.append(key)
+            starts.append(count)
+        # Align the table so it can be viewed in place
+        padding = -(SEGMENT_HEADER.size + 4 * count) % 8
+        file.write(b"\0" * padding)
+        file.write(_to_le_bytes(starts))
+        file.write(_to_le_bytes(keys))
+        file.seek(0)
+        file.write(SEGMENT_HEADER.pack(SEGMENT_MAGIC, len(keys), SEGMENT_HEADER.size + 4 * count + padding,
+                                       first_number, first_id, end_id))
+    os.replace(temp_path, path)
+
+
+def _keyed(number, keys):
+    for i, key in enumerate(keys):
+        yield key, number, i
+
+
+class Segment:
+    """
+    Read only view over one memory mapped segment file
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file, self._buffer = _map_file(path)
+        if len(self._buffer) < SEGMENT_HEADER.size:
+            self.close()
+            raise ValueError("{} is not a trigram segment!".format(path))
+        magic, num_keys, table_offset, self.first_number, self.first_id, self.end_id = \
+            SEGMENT_HEADER.unpack_from(self._buffer, 0)
+        if magic != SEGMENT_MAGIC:
+            self.close()
+            raise ValueError("{} is not a trigram segment!".format(path))
+        self._view = memoryview(self._buffer)
+        self.starts = _view_of(self._view, table_offset, num_keys + 1, "Q")
+        self.keys = _view_of(self._view, table_offset + 8 * (num_keys + 1), num_keys, "I")
+        self.ids = _view_of(self._view, SEGMENT_HEADER.size, self.starts[-1], "I")
+
+    def __len__(self):
+        return len(self.keys)
+
+    def postings_size(self, i):
+        return self.starts[i + 1] - self.starts[i]
+
+    def postings_at(self, i):
+        """
+        :param i: position of a key in the key table
+        :return: ascending ids containing the key, viewed in place in the map so nothing is decoded up front
+        """
+        return self.ids[self.starts[i]:self.starts[i + 1]]
+
+    def find(self, key):
+        """
+        :param key: int trigram key
+        :return: position of key in the key table or None
+        """
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return i
+        return None
+
+    def lookup(self, key):
+        """
+        :param key: int trigram key
+        :return: ascending ids containing key, see postings_at, or None
+        """
+        i = self.find(key)
+        return None if i is None else self.postings_at(i)
+
+    def close(self):
+        for name in ("ids", "keys", "starts", "_view"):
+            view = self.__dict__.pop(name, None)
+            if isinstance(view, memoryview):
+                view.release()
+        if self._file:
+            try:
+                self._buffer.close()
+            except BufferError:
+                # A suspended search still holds postings, the map is released together with them
+                pass
+            self._file.close()
+            self._file = None
+
+
+class IndexWriter:
+    """
+    Records files moved under root. Paths are buffered as moves happen and written out as a new segment on flush.
+    Use as a context manager so the last batch is written even if the run fails part way.
+    """
+    def __init__(self, root):
+        self.root = root
+        self.index_dir = os.path.join(root, INDEX_DIRNAME)
+        self.pending = []
+
+    def add(self, path):
+        """
+        :param path: new location of a moved file, must be under root
+        """
+        self.pending.append(os.path.relpath(path, self.root))
+        if len(self.pending) >= FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        os.makedirs(self.index_dir, exist_ok=True)
+        with _index_lock(self.index_dir):
+            first_id, offset, _ = _recover(self.index_dir)
+            postings = {}
+            names = bytearray()
+            offsets = bytearray()
+            for doc_id, path in enumerate(self.pending, first_id):
+                data = os.fsencode(path)
+                names += data
+                offsets += OFFSET_RECORD.pack(offset, len(data))
+                offset += len(data)
+                for key in trigrams(path):
+                    postings.setdefault(key, []).append(doc_id)
+            # The segment goes to disk first, then the names and last the offsets that commit both
+            segment_path = _next_segment_path(self.index_dir)
+            _write_segment(segment_path, ((key, array("I", postings[key])) for key in sorted(postings)),
+                           _segment_number(segment_path), first_id, first_id + len(self.pending))
+            with open(os.path.join(self.index_dir, NAMES_FILE), "ab") as names_file:
+                names_file.write(names)
+            with open(os.path.join(self.index_dir, OFFSETS_FILE), "ab") as offsets_file:
+                offsets_file.write(offsets)
+        logger.info("Indexed {} files.".format(len(self.pending)))
+        self.pending = []
+
+    def _merge(self, paths):
+        """
+        Merges segments into one with a k-way merge over their sorted keys. Their id ranges must not overlap, so
+        concatenating each key's postings in id order keeps them sorted. The merged segment records the lowest number
+        it replaces, so the inputs are ignored even if a crash keeps them from being removed. Must be called with the
+        lock held.
+        """
+        segments = sorted((Segment(path) for path in paths), key=lambda segment: segment.first_id)
+        try:
+            for previous, segment in zip(segments, segments[1:]):
+                if previous.end_id > segment.first_id:
+                    raise ValueError("{} and {} hold overlapping ids!".format(previous.path, segment.path))
+            merged = heapq.merge(*[_keyed(number, segment.keys) for number, segment in enumerate(segments)])
+
+            def items():
+                for key, group in itertools.groupby(merged, key=lambda item: item[0]):
+                    ids = array("I")
+                    for _, number, i in group:
+                        ids.extend(_copy_ids(segments[number].postings_at(i)))
+                    yield key, ids
+
+            _write_segment(_next_segment_path(self.index_dir), items(), min(segment.first_number for segment in segments),
+                           segments[0].first_id, segments[-1].end_id)
+        finally:
+            for segment in segments:
+                segment.close()
+        for path in paths:
+            os.remove(path)
+        logger.info("Merged {} segments.".format(len(paths)))
+
+    def compact(self):
+        """
+        Size tiered merging: while the newest MERGE_FACTOR or more segments are no larger than the tier of the newest
+        one, merge them. Each id is therefore rewritten a logarithmic number of times.
+        """
+        if not os.path.isdir(self.index_dir):
+            return
+        with _index_lock(self.index_dir):
+            count, _, paths = _recover(self.index_dir)
+            while True:
+                if len(paths) < MERGE_FACTOR:
+                    return
+                tier = _tier(paths[-1])
+                tail = list(itertools.takewhile(lambda path: _tier(path) <= tier, reversed(paths)))
+                if len(tail) < MERGE_FACTOR:
+                    return
+                tail.reverse()
+                self._merge(tail)
+                paths, _ = _live_segments(self.index_dir, count)
+
+    def close(self):
+        self.flush()
+        self.compact()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class TrigramIndex:
+    """
+    Read only, memory mapped view over the index at root
+    """
+    def __init__(self, root):
+        self.root = root
+        index_dir = os.path.join(root, INDEX_DIRNAME)
+        if not os.path.isdir(index_dir):
+            logger.error("{} has no index.".format(root))
+            raise FileNotFoundError("Please provide a directory files were categorized or organized into!")
+        # Maps stay valid after the lock is released even if a merge later removes the files
+        with _index_lock(index_dir, shared=True):
+            self._names_file, self._names = _map_file(os.path.join(index_dir, NAMES_FILE))
+            self._offsets_file, self._offsets = _map_file(os.path.join(index_dir, OFFSETS_FILE))
+            # Leftovers of an interrupted run are skipped here and removed by the next writer
+            live, _ = _live_segments(index_dir, len(self._offsets) // OFFSET_RECORD.size)
+            self.segments = [Segment(path) for path in live]
+        self._count = self.segments[-1].end_id if self.segments else 0
+
+    def __len__(self):
+        return self._count
+
+    def path(self, doc_id):
+        """
+        :param doc_id: int id of an indexed file
+        :return: path of the file relative to root
+        """
+        offset, length = OFFSET_RECORD.unpack_from(self._offsets, doc_id * OFFSET_RECORD.size)
+        return os.fsdecode(self._names[offset:offset + length])
+
+    def _substring_candidates(self, keys):
+        """
+        Yields ids containing every key, newest first
+        """
+        for segment in reversed(self.segments):
+            positions = [segment.find(key) for key in keys]
+            if any(i is None for i in positions):
+                continue
+            # Walk the rarest trigram, it bounds the candidates, and probe the others by bisecting them in place
+            positions.sort(key=segment.postings_size)
+            postings = [segment.postings_at(i) for i in positions]
+            for doc_id in reversed(postings[0]):
+                if all(_contains(ids, doc_id) for ids in postings[1:]):
+                    yield doc_id
+
+    def iter_search(self, query):
+        """
+        Lazily finds indexed files whose name contains query, ignoring case. Paths are decoded only as they are
+        consumed, so callers can stop after the results they need.
+        :param query: str
+        :return: generator of paths relative to root, newest first
+        """
+        needle = query.lower()
+        keys = trigrams(needle)
+        # Queries shorter than a trigram cannot use the index
+        candidates = self._substring_candidates(keys) if keys else range(len(self) - 1, -1, -1)
+        seen = set()
+        for doc_id in candidates:
+            path = self.path(doc_id)
+            if path in seen or needle not in os.path.basename(path).lower():
+                continue
+            seen.add(path)
+            yield path
+
+    def search(self, query, limit=None):
+        """
+        :param query: str
+        :param limit: optional int maximum number of results
+        :return: list of paths relative to root, newest first, see iter_search
+        """
+        return list(itertools.islice(self.iter_search(query), limit))
+
+    def iter_fuzzy(self, query, threshold=DEFAULT_FUZZY_THRESHOLD):
+        """
+        Lazily ranks indexed files by how many query trigrams their name shares, newest first among equal counts.
+        Only the newest MAX_FUZZY_CANDIDATES names sharing enough trigrams are ranked, so the work is bounded however
+        common the trigrams are, and a path is decoded only when it is yielded.
+        :param query: str
+        :param threshold: minimum share of query trigrams a name must contain
+        :return: generator of paths relative to root, best match first
+        """
+        keys = trigrams(query.lower())
+        if not keys:
+            yield from self.iter_search(query)
+            return
+        required = max(1, math.ceil(threshold * len(keys)))
+        ranked = []
+        budget = MAX_FUZZY_CANDIDATES
+        for segment in reversed(self.segments):
+            if not budget:
+                break
+            positions = [i for i in (segment.find(key) for key in keys) if i is not None]
+            if len(positions) < required:
+                continue
+            positions.sort(key=segment.postings_size)
+            postings = [segment.postings_at(i) for i in positions]
+            # A name in at least `required` lists has to be in one of the shortest len - required + 1 of them
+            candidates = heapq.merge(*[reversed(ids) for ids in postings[:len(postings) - required + 1]], reverse=True)
+            for doc_id, _ in itertools.groupby(candidates):
+                count = sum(1 for ids in postings if _contains(ids, doc_id))
+                if count >= required:
+                    ranked.append((-count, -doc_id))
+                budget -= 1
+                if not budget:
+                    logger.debug("Ranking the newest {} fuzzy candidates only.".format(MAX_FUZZY_CANDIDATES))
+                    break
+
+        heapq.heapify(ranked)
+        seen = set()
+        while ranked:
+            _, doc_id = heapq.heappop(ranked)
+            path = self.path(-doc_id)
+            if path not in seen:
+                seen.add(path)
+                yield path
+
+    def fuzzy(self, query, limit=DEFAULT_LIMIT, threshold=DEFAULT_FUZZY_THRESHOLD):
+        """
+        :param query: str
+        :param limit: optional int maximum number of results
+        :param threshold: minimum share of query trigrams a name must contain
+        :return: list of paths relative to root, best match first, see iter_fuzzy
+        """
+        return list(itertools.islice(self.iter_fuzzy(query, threshold), limit))
+
+    def close(self):
+        for segment in self.segments:
+            segment.close()
+        for file, buffer in ((self._names_file, self._names), (self._offsets_file, self._offsets)):
+            if file:
+                buffer.close()
+                file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+if __name__ == "__main__":
+    cl_inp = parser.parse_args()
+    if cl_inp.verbose:
+        logger.setLevel(logging.DEBUG)
+    else:
+        logger.setLevel(logging.WARN)
+    with TrigramIndex(cl_inp.root) as index:
+        if cl_inp.fuzzy:
+            matches = index.iter_fuzzy(cl_inp.query)
+        else:
+            matches = index.iter_search(cl_inp.query)
+        found = 0
+        # Results are produced lazily so stale entries are skipped without decoding every hit
+        for match in matches:
+            path = os.path.join(cl_inp.root, match)
+            # Skip files that were moved or deleted after being indexed
+            if not os.path.exists(path):
+                logger.debug("Stale entry {}.".format(path))
+                continue
+            print(path)
+            found += 1
+            if found >= cl_inp.limit:
+                break